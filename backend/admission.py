@@ -0,0 +1,267 @@
+"""
+RobbingHood Admission Control
+Decides who gets an AI slot first so the side panel never waits behind demo spam
+"""
+
+import asyncio
+import functools
+import itertools
+import time
+from collections import OrderedDict, deque
+from typing import Callable
+
+
+# Lower number = served first
+REQUEST_CLASSES = {
+    "interactive": 0,
+    "batch": 1,
+    "demo": 2,
+}
+
+# Seconds from arrival until we stop waiting and degrade instead
+DEADLINES = {
+    "interactive": 12.0,
+    "batch": 30.0,
+    "demo": 8.0,
+}
+
+# AI calls allowed in flight at once
+MAX_CONCURRENT = 4
+
+# Slots batch/demo traffic can't touch, so an interactive request always has somewhere to go
+RESERVED_INTERACTIVE = 1
+
+# Waiting requests across all classes before we start shedding
+MAX_QUEUE_DEPTH = 64
+
+# Recent wait times kept per class for the p95
+WAIT_SAMPLES = 512
+
+
+class AdmissionRejected(Exception):
+    """Base for requests the admission layer won't run."""
+
+
+class QueueFull(AdmissionRejected):
+    """Shed because the queue was full of equal or higher priority work."""
+
+
+class DeadlineExceeded(AdmissionRejected):
+    """Waited (or ran) past the request's deadline."""
+
+
+class AdmissionController:
+    """
+    Bounded priority queue in front of the AI step.
+    Classes are served strictly by priority; inside a class, clients take turns
+    so one chatty client can't starve the rest.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_queue_depth: int = MAX_QUEUE_DEPTH):
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self.running = {name: 0 for name in REQUEST_CLASSES}
+        # class -> client_id -> deque of (arrival seq, waiter future), client order = round-robin order
+        self.queues = {name: OrderedDict() for name in REQUEST_CLASSES}
+        self._arrivals = itertools.count()
+        self.waits = {name: deque(maxlen=WAIT_SAMPLES) for name in REQUEST_CLASSES}
+        self.admitted = {name: 0 for name in REQUEST_CLASSES}
+        self.shed = {name: 0 for name in REQUEST_CLASSES}
+        self.deadline_misses = {name: 0 for name in REQUEST_CLASSES}
+
+    def queue_depth(self, request_class: str = None) -> int:
+        classes = [request_class] if request_class else REQUEST_CLASSES
+        return sum(len(waiters) for name in classes for waiters in self.queues[name].values())
+
+    def _has_capacity(self, request_class: str) -> bool:
+        if sum(self.running.values()) >= self.max_concurrent:
+            return False
+        if request_class == "interactive":
+            return True
+        # Batch and demo share one pool, so together they can't eat the reserved slots
+        background = sum(count for name, count in self.running.items() if name != "interactive")
+        return background < max(1, self.max_concurrent - RESERVED_INTERACTIVE)
+
+    def _shed_lower_priority(self, request_class: str) -> bool:
+        """Make room by dropping the newest waiter of the lowest class below us, if any."""
+        for victim_class in sorted(REQUEST_CLASSES, key=REQUEST_CLASSES.get, reverse=True):
+            if REQUEST_CLASSES[victim_class] <= REQUEST_CLASSES[request_class]:
+                return False
+            clients = self.queues[victim_class]
+            if not clients:
+                continue
+            # Each client's deque is in arrival order, so the newest overall is the latest tail
+            client_id = max(clients, key=lambda cid: clients[cid][-1][0])
+            _, waiter = clients[client_id].pop()
+            if not clients[client_id]:
+                del clients[client_id]
+            if not waiter.done():
+                waiter.set_exception(QueueFull(f"Shed for higher priority {request_class} work"))
+            self.shed[victim_class] += 1
+            return True
+        return False
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters: by class priority, then round-robin across clients."""
+        for request_class in sorted(REQUEST_CLASSES, key=REQUEST_CLASSES.get):
+            clients = self.queues[request_class]
+            while clients and self._has_capacity(request_class):
+                client_id, waiters = next(iter(clients.items()))
+                _, waiter = waiters.popleft()
+                if waiters:
+                    clients.move_to_end(client_id)
+                else:
+                    del clients[client_id]
+                if waiter.done():
+                    continue
+                self.running[request_class] += 1
+                waiter.set_result(None)
+
+    def _release(self, request_class: str) -> None:
+        self.running[request_class] -= 1
+        self._dispatch()
+
+    async def _acquire(self, client_id: str, request_class: str, deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        if self.queue_depth(request_class) == 0 and self._has_capacity(request_class):
+            self.running[request_class] += 1
+            return
+
+        if self.queue_depth() >= self.max_queue_depth and not self._shed_lower_priority(request_class):
+            self.shed[request_class] += 1
+            raise QueueFull("Queue is full, try again in a sec")
+
+        waiter = loop.create_future()
+        self.queues[request_class].setdefault(client_id, deque()).append((next(self._arrivals), waiter))
+        try:
+            await asyncio.wait({waiter}, timeout=max(0.0, deadline - loop.time()))
+        except asyncio.CancelledError:
+            # Client hung up while queued; if we were just handed a slot, give it back
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self._release(request_class)
+            else:
+                self._forget(client_id, request_class, waiter)
+            raise
+
+        if not waiter.done():
+            self._forget(client_id, request_class, waiter)
+            self.deadline_misses[request_class] += 1
+            raise DeadlineExceeded("Waited too long for an AI slot")
+        # Raises QueueFull if higher priority work bumped us out of the queue
+        waiter.result()
+
+    def _forget(self, client_id: str, request_class: str, waiter: asyncio.Future) -> None:
+        waiters = self.queues[request_class].get(client_id)
+        entry = next((entry for entry in waiters or () if entry[1] is waiter), None)
+        if entry is not None:
+            waiters.remove(entry)
+            if not waiters:
+                del self.queues[request_class][client_id]
+        if not waiter.done():
+            waiter.cancel()
+
+    async def run(self, client_id: str, request_class: str, fn: Callable, *args, **kwargs):
+        """
+        Run a blocking call (the AI step) in a worker thread once admitted.
+
+        Args:
+            client_id: Who's asking, for fair queuing inside a class
+            request_class: One of REQUEST_CLASSES
+            fn: Blocking function to run
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            QueueFull: Shed on arrival or bumped by higher priority work
+            DeadlineExceeded: Didn't get a slot, or didn't finish, before the class deadline
+        """
+        loop = asyncio.get_running_loop()
+        arrived = loop.time()
+        deadline = arrived + DEADLINES[request_class]
+
+        await self._acquire(client_id, request_class, deadline)
+        self.admitted[request_class] += 1
+        self.waits[request_class].append(loop.time() - arrived)
+
+        # The slot is held until the thread actually finishes, even if we stop waiting on it,
+        # so a pile of abandoned OpenAI calls can't blow past MAX_CONCURRENT
+        future = loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        future.add_done_callback(lambda _: self._release(request_class))
+
+        done, _ = await asyncio.wait({future}, timeout=max(0.0, deadline - loop.time()))
+        if not done:
+            self.deadline_misses[request_class] += 1
+            raise DeadlineExceeded("AI took longer than the deadline")
+        return future.result()
+
+    def stats(self) -> dict:
+        """Queue depth, wait times and shed counts per class, for the health endpoint."""
+        classes = {}
+        for name in REQUEST_CLASSES:
+            waits = sorted(self.waits[name])
+            p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+            classes[name] = {
+                "queued": self.queue_depth(name),
+                "running": self.running[name],
+                "admitted": self.admitted[name],
+                "shed": self.shed[name],
+                "deadline_misses": self.deadline_misses[name],
+                "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "wait_p95_ms": round(p95 * 1000, 1),
+            }
+        return {
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self.queue_depth(),
+            "classes": classes,
+        }
+
+
+if __name__ == "__main__":
+    # Fill every background slot with crawler + demo traffic, then watch side panel latency
+    import random
+
+    # Seconds per fake AI call, roughly what real OpenAI calls take
+    SERVICE_TIME = (3.0, 5.0)
+    PANEL_REQUESTS = 8
+
+    def fake_ai(seconds: float) -> str:
+        time.sleep(seconds)
+        return "alpha"
+
+    async def client(controller, client_id, request_class, latencies, outcomes):
+        start = time.monotonic()
+        try:
+            await controller.run(client_id, request_class, fake_ai, random.uniform(*SERVICE_TIME))
+            outcomes[request_class]["ok"] += 1
+        except AdmissionRejected as e:
+            outcomes[request_class][type(e).__name__] += 1
+        latencies[request_class].append(time.monotonic() - start)
+
+    async def simulate(background_load: int):
+        controller = AdmissionController()
+        latencies = {name: [] for name in REQUEST_CLASSES}
+        outcomes = {name: {"ok": 0, "QueueFull": 0, "DeadlineExceeded": 0} for name in REQUEST_CLASSES}
+        tasks = []
+        for i in range(background_load):
+            request_class = "demo" if i % 2 else "batch"
+            tasks.append(asyncio.create_task(client(controller, f"crawler-{i % 3}", request_class, latencies, outcomes)))
+
+        # Let the background mix grab its slots before the first side panel shows up
+        await asyncio.sleep(0.5)
+        running_at_start = {name: count for name, count in controller.running.items() if count}
+        for i in range(PANEL_REQUESTS):
+            tasks.append(asyncio.create_task(client(controller, f"panel-{i}", "interactive", latencies, outcomes)))
+            await asyncio.sleep(2.0)
+        await asyncio.gather(*tasks)
+
+        interactive = sorted(latencies["interactive"])
+        p95 = interactive[min(len(interactive) - 1, int(len(interactive) * 0.95))]
+        queued_p95 = controller.stats()["classes"]["interactive"]["wait_p95_ms"] / 1000
+        print(f"Background load {background_load:>3}: running before panels {running_at_start}, "
+              f"interactive p95 {p95:.1f}s of which queued {queued_p95:.1f}s "
+              f"(calls take {SERVICE_TIME[0]:.0f}-{SERVICE_TIME[1]:.0f}s)")
+        print(f"    outcomes {outcomes}")
+
+    for load in (0, 8, 200):
+        asyncio.run(simulate(load))
@@ -5,6 +5,10 @@ Handles OpenAI API calls for the "Schizo-Analysis" Engine
 
 import os
 import json
+import threading
+import time
+from collections import deque
+from typing import Optional
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -13,6 +17,19 @@ load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
+def get_troll_band(troll_level: int = 50) -> str:
+    """Which persona a troll level lands in: serious, balanced, genz, schizo or unhinged."""
+    if troll_level <= 20:
+        return "serious"
+    elif troll_level <= 40:
+        return "balanced"
+    elif troll_level <= 60:
+        return "genz"
+    elif troll_level <= 80:
+        return "schizo"
+    return "unhinged"
+
+
 def get_system_prompt(troll_level: int = 50) -> str:
     """
     Generate a system prompt based on troll level (0-100).
@@ -20,7 +37,9 @@ def get_system_prompt(troll_level: int = 50) -> str:
     100 = Maximum troll, completely unhinged
     """
     
-    if troll_level <= 20:
+    band = get_troll_band(troll_level)
+    
+    if band == "serious":
         # Serious mode
         return """You are a professional financial analyst. Provide a measured, rational stock recommendation based on the webpage content.
 
@@ -48,7 +67,7 @@ OUTPUT FORMAT (valid JSON):
 
 Pick a real ticker from NYSE, NASDAQ, or major crypto. Keep analysis grounded and reasonable."""
 
-    elif troll_level <= 40:
+    elif band == "balanced":
         # Balanced mode
         return """You are a financial analyst with a casual style. Find investment opportunities in everyday news with clear reasoning and some personality.
 
@@ -76,7 +95,7 @@ OUTPUT FORMAT (valid JSON):
 
 Pick a real ticker. Make connections logical but don't be boring."""
 
-    elif troll_level <= 60:
+    elif band == "genz":
         # Gen Z mode (default)
         return """You are a sharp financial analyst who finds investment opportunities in everyday news and content. Your specialty is connecting real-world events to specific stocks through clear cause-and-effect reasoning. You add Gen Z flair to make it entertaining, but your logic must be SOUND and TRACEABLE.
 
@@ -112,7 +131,7 @@ OUTPUT FORMAT (valid JSON):
     }
 }"""
 
-    elif troll_level <= 80:
+    elif band == "schizo":
         # Schizo mode
         return """You are a degenerate day trader who finds "alpha" in EVERYTHING. Your logic is creative and far-fetched but still has SOME connection to reality. You speak in heavy Gen Z slang.
 
@@ -170,13 +189,194 @@ OUTPUT FORMAT (valid JSON):
 Pick a real ticker. BE ABSOLUTELY UNHINGED but entertaining."""
 
 
-def analyze_webpage_content(webpage_text: str, troll_level: int = 50) -> dict:
+# Model tiers, fastest first. Prices are USD per 1M tokens (input, output).
+MODEL_TIERS = {
+    "fast": {
+        "model": os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini"),
+        "input_cost": 0.15,
+        "output_cost": 0.60,
+    },
+    "standard": {
+        "model": os.getenv("OPENAI_STANDARD_MODEL", "gpt-4o"),
+        "input_cost": 2.50,
+        "output_cost": 10.00,
+    },
+}
+
+# Routing SLO: p95 latency per route before we fall back to the fast tier,
+# and the most a single analysis is allowed to cost before it gets downgraded
+LATENCY_SLO_MS = float(os.getenv("ROUTING_LATENCY_SLO_MS", "6000"))
+MAX_COST_USD = float(os.getenv("ROUTING_MAX_COST_USD", "0.01"))
+
+# Only this many seconds of latency samples count, so a tier that got slow can recover
+LATENCY_WINDOW_SECONDS = 300
+
+# Need at least this many recent samples before we trust the p95
+MIN_LATENCY_SAMPLES = 5
+
+# Content shorter than this is a snippet, not an article
+SHORT_CONTENT_CHARS = 1500
+
+# Max chars of page text we send, same cap as always
+MAX_INPUT_CHARS = 4000
+
+# The JSON answer is ~150-250 tokens; serious mode writes longer reasoning
+TOKEN_BUDGETS = {
+    "serious": 500,
+    "balanced": 400,
+    "genz": 400,
+    "schizo": 350,
+    "unhinged": 350,
+}
+
+REQUIRED_FIELDS = ("ticker", "asset_type", "action", "confidence", "reasoning", "vibe")
+
+
+class RouteStats:
+    """Latency, cost and validity numbers for one route + tier."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.invalid = 0
+        self.fallbacks = 0
+        self.total_cost = 0.0
+        self.latencies = deque(maxlen=256)
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float, cost: float = 0.0, error: bool = False, valid: bool = True) -> None:
+        with self._lock:
+            self.calls += 1
+            self.total_cost += cost
+            self.latencies.append((time.time(), latency_ms))
+            if error:
+                self.errors += 1
+            elif not valid:
+                self.invalid += 1
+
+    def recent_p95_ms(self) -> Optional[float]:
+        cutoff = time.time() - LATENCY_WINDOW_SECONDS
+        with self._lock:
+            recent = sorted(ms for ts, ms in self.latencies if ts >= cutoff)
+        if len(recent) < MIN_LATENCY_SAMPLES:
+            return None
+        return recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            latencies = [ms for _, ms in self.latencies]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "invalid": self.invalid,
+            "fallbacks": self.fallbacks,
+            "total_cost_usd": round(self.total_cost, 6),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p95_latency_ms": round(self.recent_p95_ms() or 0.0, 1),
+        }
+
+
+_route_stats = {}
+_route_stats_lock = threading.Lock()
+
+
+def _stats_for_unlocked(route: str, tier: str) -> RouteStats:
+    key = f"{route}:{tier}"
+    if key not in _route_stats:
+        _route_stats[key] = RouteStats()
+    return _route_stats[key]
+
+
+def _stats_for(route: str, tier: str) -> RouteStats:
+    with _route_stats_lock:
+        return _stats_for_unlocked(route, tier)
+
+
+def estimate_cost(tier: str, prompt_chars: int, max_tokens: int) -> float:
+    """Worst-case USD for one call, using the ~4 chars per token rule of thumb."""
+    prices = MODEL_TIERS[tier]
+    return (prompt_chars / 4 * prices["input_cost"] + max_tokens * prices["output_cost"]) / 1_000_000
+
+
+def route_request(troll_level: int, content_length: int, tier: Optional[str] = None) -> dict:
+    """
+    Pick model tier, token budget and temperature for one analysis.
+
+    Serious takes on real articles get the standard model; snippets and high troll
+    levels (where the logic is supposed to be unhinged anyway) go to the fast one.
+    A route whose standard tier is blowing the latency SLO, or a call that would
+    cost more than MAX_COST_USD, falls back to the fast tier.
+
+    Args:
+        troll_level: 0-100 scale, already clamped
+        content_length: Characters of page text
+        tier: Force a tier (used by the eval harness), skips the SLO fallback
+
+    Returns:
+        dict: {"route", "tier", "model", "max_completion_tokens", "temperature", "fallback"}
+    """
+    band = get_troll_band(troll_level)
+    size = "short" if content_length < SHORT_CONTENT_CHARS else "long"
+    route = f"{band}/{size}"
+    max_tokens = TOKEN_BUDGETS[band]
+
+    fallback = None
+    if tier is None:
+        tier = "standard" if size == "long" and band in ("serious", "balanced", "genz") else "fast"
+
+        if tier != "fast":
+            p95 = _stats_for(route, tier).recent_p95_ms()
+            prompt_chars = len(get_system_prompt(troll_level)) + min(content_length, MAX_INPUT_CHARS)
+            if p95 is not None and p95 > LATENCY_SLO_MS:
+                fallback = "latency"
+            elif estimate_cost(tier, prompt_chars, max_tokens) > MAX_COST_USD:
+                fallback = "cost"
+            if fallback:
+                with _route_stats_lock:
+                    _stats_for_unlocked(route, tier).fallbacks += 1
+                tier = "fast"
+
+    return {
+        "route": route,
+        "tier": tier,
+        "model": MODEL_TIERS[tier]["model"],
+        "max_completion_tokens": max_tokens,
+        # Range: 0.3 to 1.0
+        "temperature": 0.3 + (troll_level / 100) * 0.7,
+        "fallback": fallback,
+    }
+
+
+def validate_analysis(result) -> bool:
+    """Does the AI output have everything the side panel needs?"""
+    if not isinstance(result, dict):
+        return False
+    if any(not result.get(field) and result.get(field) != 0 for field in REQUIRED_FIELDS):
+        return False
+    return str(result.get("action", "")).upper() in ("BUY", "SELL")
+
+
+def get_routing_stats() -> dict:
+    """Per route + tier stats for the health endpoint."""
+    with _route_stats_lock:
+        items = list(_route_stats.items())
+    return {
+        "latency_slo_ms": LATENCY_SLO_MS,
+        "max_cost_usd": MAX_COST_USD,
+        "tiers": {name: tier["model"] for name, tier in MODEL_TIERS.items()},
+        "routes": {key: stats.to_dict() for key, stats in sorted(items)},
+    }
+
+
+def analyze_webpage_content(webpage_text: str, troll_level: int = 50, tier: Optional[str] = None) -> dict:
     """
     Analyze webpage content and generate a stock recommendation.
+    The model, token budget and temperature come from route_request.
     
     Args:
         webpage_text: The text content scraped from the webpage
         troll_level: 0-100 scale, 0=serious, 100=maximum troll
+        tier: Force a model tier ("fast" or "standard") instead of routing
         
     Returns:
         dict: JSON response with ticker, action, reasoning, etc.
@@ -187,30 +387,42 @@ def analyze_webpage_content(webpage_text: str, troll_level: int = 50) -> dict:
     # Get appropriate prompt
     system_prompt = get_system_prompt(troll_level)
     
-    # Adjust temperature based on troll level
-    temperature = 0.3 + (troll_level / 100) * 0.7  # Range: 0.3 to 1.0
+    # Pick model tier, token budget and temperature for this request
+    route = route_request(troll_level, len(webpage_text or ""), tier)
+    stats = _stats_for(route["route"], route["tier"])
+    started = time.time()
     
     try:
         response = client.chat.completions.create(
-            model="gpt-4o",
+            model=route["model"],
             messages=[
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyze this webpage content and give me the alpha:\n\n{webpage_text[:4000]}"}
+                {"role": "user", "content": f"Analyze this webpage content and give me the alpha:\n\n{webpage_text[:MAX_INPUT_CHARS]}"}
             ],
             response_format={"type": "json_object"},
-            temperature=temperature,
-            max_completion_tokens=500
+            temperature=route["temperature"],
+            max_completion_tokens=route["max_completion_tokens"]
         )
+        latency_ms = (time.time() - started) * 1000
+        
+        usage = getattr(response, "usage", None)
+        prices = MODEL_TIERS[route["tier"]]
+        cost = (
+            (getattr(usage, "prompt_tokens", 0) or 0) * prices["input_cost"]
+            + (getattr(usage, "completion_tokens", 0) or 0) * prices["output_cost"]
+        ) / 1_000_000
         
         # Debug: print the full response object
         print("[DEBUG] OpenAI API raw response:", response)
         if not hasattr(response, 'choices') or not response.choices:
+            stats.record(latency_ms, cost, error=True)
             return {
                 "success": False,
                 "error": "No choices returned from OpenAI API. Check your API key, quota, or model access."
             }
         content = getattr(response.choices[0].message, 'content', None)
         if not isinstance(content, str):
+            stats.record(latency_ms, cost, valid=False)
             return {
                 "success": False,
                 "error": "OpenAI API response missing or invalid 'message.content'.",
@@ -219,23 +431,28 @@ def analyze_webpage_content(webpage_text: str, troll_level: int = 50) -> dict:
         try:
             result = json.loads(content)
         except Exception as e:
+            stats.record(latency_ms, cost, valid=False)
             return {
                 "success": False,
                 "error": f"Failed to parse AI response as JSON: {str(e)}",
                 "raw_content": content
             }
+        stats.record(latency_ms, cost, valid=validate_analysis(result))
         return {
             "success": True,
             "data": result,
-            "troll_level": troll_level
+            "troll_level": troll_level,
+            "route": route
         }
         
     except json.JSONDecodeError as e:
+        stats.record((time.time() - started) * 1000, valid=False)
         return {
             "success": False,
             "error": f"Failed to parse AI response: {str(e)}"
         }
     except Exception as e:
+        stats.record((time.time() - started) * 1000, error=True)
         return {
             "success": False,
             "error": f"AI analysis failed: {str(e)}"
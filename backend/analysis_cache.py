@@ -0,0 +1,102 @@
+"""
+RobbingHood Analysis Cache
+Remembers what we said about each page so repeat visits skip the upload and the LLM
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+
+# How long a cached analysis can be reused before the page gets a fresh take
+ANALYSIS_TTL = 6 * 3600
+
+# Max pages remembered at once (least recently used goes first)
+MAX_ENTRIES = 2048
+
+
+def content_fingerprint(text: str) -> str:
+    """
+    Hash page text the same way the extension does: whitespace collapsed, then SHA-256.
+    Collapsing whitespace keeps re-renders that only shuffle newlines from counting as changes.
+    """
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def normalize_url(url: str) -> str:
+    """Drop the #fragment and lowercase scheme/host so the same page maps to one key."""
+    parts = urlsplit((url or "").strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+class AnalysisCache:
+    """
+    URL -> {fingerprint, analysis, timestamp}, keyed per troll level since
+    the same page gets a very different take at 10 vs 90.
+    """
+
+    def __init__(self, ttl: float = ANALYSIS_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.changed = 0
+
+    def get(self, url: str, troll_level: int, fingerprint: str) -> Optional[dict]:
+        """
+        Return the cached entry if the page is unchanged and still fresh.
+
+        Returns:
+            dict: {"fingerprint", "analysis", "timestamp"}, or None on a miss
+        """
+        key = (normalize_url(url), troll_level)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry["timestamp"] > self.ttl:
+                self.misses += 1
+                return None
+            if entry["fingerprint"] != fingerprint:
+                self.changed += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def peek(self, url: str, troll_level: int) -> Optional[dict]:
+        """
+        Whatever we last said about a page, stale or not.
+        Only for degrading under load - a slightly old take beats a timeout.
+        """
+        with self._lock:
+            return self._entries.get((normalize_url(url), troll_level))
+
+    def set(self, url: str, troll_level: int, fingerprint: str, analysis: dict) -> None:
+        """Remember a fresh analysis for a page."""
+        key = (normalize_url(url), troll_level)
+        with self._lock:
+            self._entries[key] = {
+                "fingerprint": fingerprint,
+                "analysis": analysis,
+                "timestamp": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "changed": self.changed,
+            }
+
+
+analysis_cache = AnalysisCache()
@@ -0,0 +1,100 @@
+"""
+RobbingHood Tier Eval
+Runs the same pages through every model tier and compares how often the output is usable
+
+Run with: python eval_tiers.py --runs 3 --levels 10 50 90
+"""
+
+import argparse
+import time
+
+from ai_logic import MODEL_TIERS, SAMPLE_WEBPAGE_TEXT, analyze_webpage_content, validate_analysis
+from finance import resolve_ticker
+
+
+# A snippet, a serious article and some chaos, so every route gets exercised
+EVAL_SAMPLES = {
+    "weather": SAMPLE_WEBPAGE_TEXT,
+    "snippet": "New iPhone launch event confirmed for next month, leakers say the camera bump got even bigger.",
+    "earnings": """
+Chipmaker Reports Record Quarter as Data Center Demand Surges
+
+The company posted quarterly revenue well above analyst expectations, driven by demand for
+accelerators used to train and serve large AI models. Data center revenue more than doubled
+year over year, while gaming revenue was roughly flat. Management guided next quarter above
+consensus, citing supply improvements and new product ramps. Gross margin expanded on a richer
+product mix. Shares rose in after-hours trading as investors digested the results and the
+raised outlook. Analysts noted that hyperscaler capital expenditure plans remain strong,
+though some warned that export restrictions could weigh on international sales.
+""" * 3,
+    "chaos": """
+Local man claims his cat predicted the last three market crashes by knocking specific mugs off
+the counter. The cat, named Biscuit, reportedly ignores bonds entirely and has shown strong
+interest in anything involving laser pointers and cardboard boxes. Neighbours say Biscuit has
+been staring at the delivery van parked outside for three days straight.
+""",
+}
+
+
+def is_usable(result: dict) -> bool:
+    """
+    Valid JSON with every field the panel needs, and a ticker we can actually look up.
+    Goes through resolve_ticker (index, then validation cache, then yfinance) so real
+    tickers outside the bundled listing still count.
+    """
+    if not result.get("success"):
+        return False
+    data = result["data"]
+    if not validate_analysis(data):
+        return False
+    return resolve_ticker(str(data.get("ticker", "")), data.get("asset_type") or "stock") is not None
+
+
+def evaluate(tiers: list, levels: list, runs: int) -> dict:
+    """
+    Run every sample at every troll level through each tier.
+
+    Returns:
+        dict: tier -> {"calls", "valid", "avg_latency_ms", "by_level": {level: valid rate}}
+    """
+    report = {}
+    for tier in tiers:
+        calls, valid, total_ms = 0, 0, 0.0
+        by_level = {}
+        for level in levels:
+            level_valid = 0
+            for text in EVAL_SAMPLES.values():
+                for _ in range(runs):
+                    started = time.time()
+                    result = analyze_webpage_content(text, level, tier=tier)
+                    total_ms += (time.time() - started) * 1000
+                    calls += 1
+                    if is_usable(result):
+                        valid += 1
+                        level_valid += 1
+            by_level[level] = level_valid / (len(EVAL_SAMPLES) * runs)
+        report[tier] = {
+            "calls": calls,
+            "valid": valid,
+            "avg_latency_ms": total_ms / calls if calls else 0.0,
+            "by_level": by_level,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare model tiers' output validity rates")
+    parser.add_argument("--tiers", nargs="+", default=list(MODEL_TIERS), choices=list(MODEL_TIERS))
+    parser.add_argument("--levels", nargs="+", type=int, default=[10, 50, 90])
+    parser.add_argument("--runs", type=int, default=2, help="Calls per sample per troll level")
+    args = parser.parse_args()
+
+    print(f"Evaluating {', '.join(args.tiers)} on {len(EVAL_SAMPLES)} samples x troll levels {args.levels} x {args.runs} runs")
+    print("-" * 50)
+
+    report = evaluate(args.tiers, args.levels, args.runs)
+    for tier, row in report.items():
+        rate = row["valid"] / row["calls"] if row["calls"] else 0.0
+        levels = "  ".join(f"L{level}: {level_rate:.0%}" for level, level_rate in row["by_level"].items())
+        print(f"{tier:>8} ({MODEL_TIERS[tier]['model']}): valid {rate:.0%} of {row['calls']}, "
+              f"avg {row['avg_latency_ms']:.0f}ms | {levels}")
@@ -4,11 +4,13 @@ Handles market data fetching via yfinance with retry logic
 """
 
 import yfinance as yf
-from datetime import datetime, timedelta
 from typing import Optional
 import time
 import random
 
+from history_store import RANGES, get_price_history
+from symbol_index import get_symbol_index, looks_like_symbol, normalize_symbol, validation_cache
+
 
 # Fallback data for common tickers when yfinance fails
 FALLBACK_DATA = {
@@ -78,7 +80,8 @@ def generate_mock_price_history(base_price: float, days: int = 7, trend: str = "
     return price_history
 
 
-def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, forecast: dict = None) -> dict:
+def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, forecast: dict = None,
+                    period: str = "7d", interval: str = "1d") -> dict:
     """
     Fetch real-time and historical price data for a ticker.
     Falls back to cached data if yfinance fails.
@@ -87,6 +90,8 @@ def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, fo
         ticker: Stock or crypto ticker symbol (e.g., "AAPL", "BTC-USD")
         asset_type: Either "stock" or "crypto"
         retries: Number of retry attempts
+        period: Chart range, one of history_store.RANGES ("1d", "7d", "1mo", "1y")
+        interval: Chart resolution, one of history_store.INTERVALS ("1h", "4h", "1d", "1wk")
         
     Returns:
         dict: Price data including current price, 24h change, and historical data
@@ -102,6 +107,8 @@ def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, fo
     if forecast:
         trend = forecast.get("trend", "FLAT")
         volatility = forecast.get("volatility", 50)
+
+    history_days = RANGES.get(period, 7)
     
     # Try to fetch real data
     for attempt in range(retries + 1):
@@ -125,24 +132,23 @@ def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, fo
             else:
                 change_24h = 0
             
-            # Get 7-day historical data for the chart
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=7)
-            
+            # Get historical data for the chart, only downloading bars the local store is missing
+            history_is_mock = False
             try:
-                history = stock.history(start=start_date, end=end_date)
-                price_history = []
-                for index, row in history.iterrows():
-                    price_history.append({
-                        "timestamp": index.isoformat(),
-                        "price": round(row["Close"], 2)
-                    })
+                price_history = get_price_history(
+                    ticker,
+                    lambda start, end, bar_interval: stock.history(start=start, end=end, interval=bar_interval),
+                    period=period,
+                    interval=interval
+                )
                 # If real history is empty, generate mock data for chart
                 if not price_history:
-                    price_history = generate_mock_price_history(current_price, days=7, trend=trend, volatility=volatility)
+                    price_history = generate_mock_price_history(current_price, days=history_days, trend=trend, volatility=volatility)
+                    history_is_mock = True
             except:
                 # Generate mock data if history fetch fails
-                price_history = generate_mock_price_history(current_price, days=7, trend=trend, volatility=volatility)
+                price_history = generate_mock_price_history(current_price, days=history_days, trend=trend, volatility=volatility)
+                history_is_mock = True
             
             return {
                 "success": True,
@@ -155,7 +161,9 @@ def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, fo
                     "market_cap": info.get("marketCap"),
                     "volume": info.get("volume"),
                     "price_history": price_history,
-                    "currency": info.get("currency", "USD")
+                    "currency": info.get("currency", "USD"),
+                    # Real quote, but the chart is made up
+                    "is_fallback": history_is_mock
                 }
             }
             
@@ -186,7 +194,7 @@ def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, fo
             change = random.uniform(-3, 3)
             
             # Generate mock price history for charts
-            price_history = generate_mock_price_history(base_price, days=7, trend=trend, volatility=volatility)
+            price_history = generate_mock_price_history(base_price, days=history_days, trend=trend, volatility=volatility)
             
             return {
                 "success": True,
@@ -205,26 +213,129 @@ def get_ticker_data(ticker: str, asset_type: str = "stock", retries: int = 2, fo
             }
 
 
-def validate_ticker(ticker: str) -> bool:
+def get_live_price(ticker: str) -> Optional[dict]:
     """
-    Check if a ticker symbol is valid and has data available.
+    Cheap quote for the live price stream - no history, no retries.
+    Uses fast_info instead of .info since this runs every few seconds per ticker.
     
     Args:
-        ticker: The ticker symbol to validate
+        ticker: Ticker symbol as yfinance knows it (e.g. "AAPL", "BTC-USD")
         
     Returns:
-        bool: True if valid, False otherwise
+        dict: {"price", "previous_close", "change_24h_percent"}, or None if no quote is available
+    """
+    try:
+        quote = yf.Ticker(ticker).fast_info
+        price = quote.last_price
+        previous_close = quote.previous_close or price
+        is_fallback = False
+    except Exception:
+        price = None
+
+    if not price:
+        if ticker not in FALLBACK_DATA:
+            return None
+        # Same wiggle as the get_ticker_data fallback so the panel still feels live
+        previous_close = FALLBACK_DATA[ticker]["price"]
+        price = previous_close * (1 + random.uniform(-0.02, 0.02))
+        is_fallback = True
+
+    change_24h = ((price - previous_close) / previous_close) * 100 if previous_close else 0
+    return {
+        "price": round(price, 2),
+        "previous_close": round(previous_close, 2),
+        "change_24h_percent": round(change_24h, 2),
+        "is_fallback": is_fallback
+    }
+
+
+def check_ticker(ticker: str) -> Optional[bool]:
     """
-    # Check fallback first
-    if ticker in FALLBACK_DATA or f"{ticker}-USD" in FALLBACK_DATA:
+    Three-way ticker check: the local symbol index first, then the validation cache,
+    and only asks yfinance for symbols neither of them has seen.
+    
+    Args:
+        ticker: The ticker symbol to check
+        
+    Returns:
+        True if valid, False if definitely not, None if we couldn't tell (yfinance unreachable)
+    """
+    symbol = normalize_symbol(ticker)
+    if not symbol:
+        return False
+
+    # Check fallback and the bundled listing first
+    if symbol in FALLBACK_DATA or f"{symbol}-USD" in FALLBACK_DATA:
+        return True
+    if symbol in get_symbol_index():
         return True
+
+    cached = validation_cache.get(symbol)
+    if cached is not None:
+        return cached
     
     try:
-        stock = yf.Ticker(ticker)
+        stock = yf.Ticker(symbol)
         info = stock.info
-        return info.get("regularMarketPrice") is not None or info.get("currentPrice") is not None
+        is_valid = info.get("regularMarketPrice") is not None or info.get("currentPrice") is not None
     except:
-        return False
+        # Network hiccups are not proof the ticker is fake, so don't cache them
+        return None
+
+    validation_cache.set(symbol, is_valid)
+    return is_valid
+
+
+def validate_ticker(ticker: str) -> bool:
+    """
+    Check if a ticker symbol is valid and has data available.
+    
+    Args:
+        ticker: The ticker symbol to validate
+        
+    Returns:
+        bool: True if valid, False otherwise (including when yfinance can't be reached)
+    """
+    return check_ticker(ticker) is True
+
+
+def resolve_ticker(ticker: str, asset_type: str = "stock") -> Optional[dict]:
+    """
+    Turn whatever the AI called the ticker ("$NVDA", "BTC", "Nvidia") into a real symbol.
+    Ticker-shaped input that isn't in the index gets checked as-is before any
+    name search, so unlisted real tickers aren't rewritten to other companies.
+    
+    Args:
+        ticker: Raw ticker or company name from the AI
+        asset_type: The AI's guess, either "stock" or "crypto"
+        
+    Returns:
+        dict: {"symbol", "name", "exchange", "asset_type", "validated"}, or None if the
+        ticker is definitely not real. "validated" is False when yfinance couldn't be
+        reached, so callers should still try get_ticker_data and its fallback.
+    """
+    index = get_symbol_index()
+    entry = index.lookup(ticker, asset_type)
+    if entry is None and not looks_like_symbol(ticker):
+        entry = index.search_name(ticker)
+    if entry is not None:
+        return {**entry, "validated": True}
+
+    symbol = normalize_symbol(ticker)
+    if asset_type == "crypto" and symbol and not symbol.endswith("-USD"):
+        symbol = f"{symbol}-USD"
+
+    status = check_ticker(symbol)
+    if status is False:
+        return None
+
+    return {
+        "symbol": symbol,
+        "name": symbol,
+        "exchange": "",
+        "asset_type": asset_type,
+        "validated": status is True,
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+RobbingHood History Store
+Keeps fetched price bars on disk so charts only download the bars we don't have yet
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+import numpy as np
+
+
+STORE_DIR = os.getenv(
+    "HISTORY_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history")
+)
+
+# Chart ranges the API accepts, in days
+RANGES = {
+    "1d": 1,
+    "7d": 7,
+    "1mo": 30,
+    "1y": 365,
+}
+
+# Output resolutions: bucket size in seconds and which stored series they're built from.
+# Intraday charts come off hourly bars, everything else off daily bars.
+INTERVALS = {
+    "1h": {"seconds": 3600, "source": "1h"},
+    "4h": {"seconds": 4 * 3600, "source": "1h"},
+    "1d": {"seconds": 86400, "source": "1d"},
+    "1wk": {"seconds": 7 * 86400, "source": "1d"},
+}
+
+# How long a stored series counts as up to date before we ask for the tail again
+REFRESH_AFTER = {
+    "1h": 15 * 60,
+    "1d": 60 * 60,
+}
+
+# Longest stretch without bars we still treat as "no data missing" (long weekend)
+MARKET_GAP_SECONDS = 4 * 86400
+
+BAR_DTYPE = np.dtype([("ts", "<i8"), ("close", "<f8")])
+
+_fetched_at = {}
+_covered_from = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _series_path(symbol: str, source: str) -> str:
+    safe_symbol = re.sub(r"[^A-Z0-9\-]", "_", symbol.upper())
+    return os.path.join(STORE_DIR, f"{safe_symbol}_{source}.npy")
+
+
+def _series_lock(key: tuple) -> threading.Lock:
+    with _locks_guard:
+        if key not in _locks:
+            _locks[key] = threading.Lock()
+        return _locks[key]
+
+
+def load_bars(symbol: str, source: str) -> np.ndarray:
+    """Memory-map the stored bars for a symbol, or an empty array if we have none yet."""
+    path = _series_path(symbol, source)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=BAR_DTYPE)
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Corrupt history file {path}, starting over: {e}")
+        return np.empty(0, dtype=BAR_DTYPE)
+
+
+def save_bars(symbol: str, source: str, bars: np.ndarray) -> None:
+    """Write bars atomically so a crash mid-write never leaves a half file behind."""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = _series_path(symbol, source)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, bars)
+    os.replace(tmp_path, path)
+
+
+def frame_to_bars(history) -> np.ndarray:
+    """
+    Convert a yfinance history DataFrame to bars without going row by row.
+    yfinance indexes are in exchange-local time, so they're shifted to naive UTC first.
+    """
+    if history is None or len(history) == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    index = history.index
+    if index.tz is not None:
+        index = index.tz_convert(None)
+
+    bars = np.empty(len(history), dtype=BAR_DTYPE)
+    bars["ts"] = index.to_numpy().astype("datetime64[s]").astype("<i8")
+    bars["close"] = history["Close"].to_numpy(dtype="f8")
+    return bars[~np.isnan(bars["close"])]
+
+
+def merge_bars(existing: np.ndarray, fresh: np.ndarray) -> np.ndarray:
+    """
+    Merge newly fetched bars into stored ones, sorted by time.
+    Fresh bars win on duplicate timestamps since the latest bar is usually still forming.
+    """
+    if len(existing) == 0:
+        combined = fresh
+    elif len(fresh) == 0:
+        return np.asarray(existing)
+    else:
+        combined = np.concatenate([fresh, existing])
+
+    # np.unique keeps the first occurrence, which is the fresh one
+    _, first = np.unique(combined["ts"], return_index=True)
+    return combined[first]
+
+
+def downsample(bars: np.ndarray, bucket_seconds: int) -> np.ndarray:
+    """Keep the last close in each time bucket (weeks start on Monday)."""
+    if len(bars) == 0:
+        return bars
+
+    # Unix epoch was a Thursday, shift by 3 days so weekly buckets line up with Mondays
+    offset = 3 * 86400 if bucket_seconds % (7 * 86400) == 0 else 0
+    buckets = (bars["ts"] + offset) // bucket_seconds
+    last_in_bucket = np.flatnonzero(np.diff(buckets, append=buckets[-1] + 1))
+    return bars[last_in_bucket]
+
+
+def bars_to_points(bars: np.ndarray) -> list:
+    """Shape bars into the {"timestamp", "price"} points the charts expect."""
+    timestamps = np.datetime_as_string(bars["ts"].astype("datetime64[s]"), timezone="UTC")
+    prices = np.round(bars["close"], 2)
+    return [
+        {"timestamp": timestamp, "price": price}
+        for timestamp, price in zip(timestamps.tolist(), prices.tolist())
+    ]
+
+
+def get_price_history(
+    symbol: str,
+    fetch: Callable[[datetime, datetime, str], object],
+    period: str = "7d",
+    interval: str = "1d",
+) -> list:
+    """
+    Serve a price history range from the local store, fetching only what's missing.
+
+    Args:
+        symbol: Ticker symbol as yfinance knows it (e.g. "AAPL", "BTC-USD")
+        fetch: Called as fetch(start, end, interval) and returns a yfinance history DataFrame
+        period: One of RANGES ("1d", "7d", "1mo", "1y")
+        interval: One of INTERVALS ("1h", "4h", "1d", "1wk")
+
+    Returns:
+        list: [{"timestamp": iso string, "price": float}, ...] oldest first
+    """
+    if period not in RANGES:
+        raise ValueError(f"Unsupported range '{period}', pick one of {', '.join(RANGES)}")
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval '{interval}', pick one of {', '.join(INTERVALS)}")
+
+    source = INTERVALS[interval]["source"]
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(days=RANGES[period])
+    start_ts = int(start.timestamp())
+
+    key = (symbol.upper(), source)
+    with _series_lock(key):
+        bars = load_bars(symbol, source)
+        fresh = []
+
+        if len(bars) == 0:
+            fresh.append(frame_to_bars(fetch(start, now, source)))
+            _covered_from[key] = start_ts
+        else:
+            # Markets close on weekends/holidays, so the first stored bar can trail the range start
+            covered_from = _covered_from.get(key, int(bars["ts"][0]) - MARKET_GAP_SECONDS)
+            if start_ts < covered_from:
+                head_end = datetime.fromtimestamp(int(bars["ts"][0]), timezone.utc)
+                fresh.append(frame_to_bars(fetch(start, head_end, source)))
+                _covered_from[key] = start_ts
+
+            # Only ask for the tail since the last stored bar
+            if time.time() - _fetched_at.get(key, 0) > REFRESH_AFTER[source]:
+                tail_start = datetime.fromtimestamp(int(bars["ts"][-1]), timezone.utc)
+                fresh.append(frame_to_bars(fetch(tail_start, now, source)))
+
+        if fresh:
+            _fetched_at[key] = time.time()
+            new_bars = np.concatenate(fresh)
+            if len(new_bars):
+                bars = merge_bars(bars, new_bars)
+                save_bars(symbol, source, bars)
+
+    in_range = np.asarray(bars[np.searchsorted(bars["ts"], start_ts):])
+    if interval != source:
+        in_range = downsample(in_range, INTERVALS[interval]["seconds"])
+    return bars_to_points(in_range)
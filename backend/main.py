@@ -3,14 +3,19 @@ RobbingHood FastAPI Backend
 The most unhinged financial advisor API
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 import json
 
-from ai_logic import analyze_webpage_content, SAMPLE_WEBPAGE_TEXT
-from finance import get_ticker_data, validate_ticker
+from ai_logic import analyze_webpage_content, get_routing_stats, SAMPLE_WEBPAGE_TEXT
+from finance import get_ticker_data, validate_ticker, resolve_ticker, get_live_price
+from history_store import RANGES, INTERVALS
+from price_stream import MAX_TICKERS_PER_CLIENT, PriceHub, Subscriber
+from analysis_cache import analysis_cache, content_fingerprint
+from admission import AdmissionController, AdmissionRejected, REQUEST_CLASSES
 from portfolio_store import init_user, get_portfolio, trade, leaderboard
 
 
@@ -30,10 +35,47 @@ app.add_middleware(
 )
 
 
+# One shared poller per ticker for every open side panel
+price_hub = PriceHub(get_live_price)
+
+
+# Priority queue in front of the AI step so side panel requests don't wait behind demo/crawler traffic
+admission = AdmissionController()
+
+# Cache key for /analyze/demo results, so the demo can degrade to its last answer too
+DEMO_URL = "demo://sample"
+
+# User agents that get batch priority instead of interactive
+BOT_USER_AGENT_HINTS = ("bot", "crawler", "spider", "python-requests")
+
+
+def get_request_class(http_request: Request, default: str = "interactive") -> str:
+    """
+    Pick the admission class. X-Request-Class can only lower priority, never raise it,
+    so a script can't claim interactive to jump the queue. Known bots get batch.
+    """
+    user_agent = http_request.headers.get("user-agent", "").lower()
+    if default == "interactive" and any(hint in user_agent for hint in BOT_USER_AGENT_HINTS):
+        default = "batch"
+    requested = http_request.headers.get("x-request-class", "").lower()
+    if requested in REQUEST_CLASSES and REQUEST_CLASSES[requested] >= REQUEST_CLASSES[default]:
+        return requested
+    return default
+
+
+def get_client_id(http_request: Request) -> str:
+    """
+    Who to round-robin on: the caller's IP. Client-sent ids aren't trusted here,
+    since minting a fresh one per request would buy extra turns.
+    """
+    return http_request.client.host if http_request.client else "unknown"
+
+
 # Request/Response Models
 class AnalysisRequest(BaseModel):
-    webpage_text: str
+    webpage_text: Optional[str] = None  # Can be skipped when url + content_hash match a cached analysis
     url: Optional[str] = None
+    content_hash: Optional[str] = None  # SHA-256 of the whitespace-collapsed page text
     troll_level: Optional[int] = 50  # 0-100, default is 50 (Gen Z mode)
 
 
@@ -43,6 +85,9 @@ class AnalysisResponse(BaseModel):
     market_data: Optional[dict] = None
     troll_level: Optional[int] = None
     error: Optional[str] = None
+    cached: bool = False  # True when the page was unchanged and the stored analysis was reused
+    degraded: bool = False  # True when we were overloaded and served the last known analysis instead
+    content_hash: Optional[str] = None
 
 class InitUserRequest(BaseModel):
     user_id: str
@@ -74,32 +119,132 @@ async def health_check():
     return {
         "status": "healthy",
         "ai_engine": "ready",
-        "market_connector": "ready"
+        "market_connector": "ready",
+        "price_stream": price_hub.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "admission": admission.stats(),
+        "model_routing": get_routing_stats()
     }
 
 
+def build_analysis_response(analysis_data: dict, troll_level: int, **extra) -> AnalysisResponse:
+    """
+    Attach market data to an AI analysis.
+    Shared by fresh analyses and cache hits, so reused analyses still get live prices.
+    """
+    ticker = analysis_data.get("ticker", "")
+    asset_type = analysis_data.get("asset_type", "stock")
+    forecast = analysis_data.get("forecast")
+    
+    # Normalize the AI's ticker before spending any market data calls on it
+    resolved = resolve_ticker(ticker, asset_type)
+    if resolved is None:
+        return AnalysisResponse(
+            success=True,
+            analysis=analysis_data,
+            market_data=None,
+            troll_level=troll_level,
+            error=f"Warning: Could not fetch market data - unknown ticker '{ticker}'",
+            **extra
+        )
+    analysis_data["ticker"] = resolved["symbol"]
+    analysis_data["asset_type"] = resolved["asset_type"]
+    
+    # Fetch real market data for the ticker
+    market_result = get_ticker_data(resolved["symbol"], resolved["asset_type"], forecast=forecast)
+    
+    if not market_result["success"]:
+        # Still return the analysis, just without market data
+        return AnalysisResponse(
+            success=True,
+            analysis=analysis_data,
+            market_data=None,
+            troll_level=troll_level,
+            error=f"Warning: Could not fetch market data - {market_result.get('error')}",
+            **extra
+        )
+    
+    return AnalysisResponse(
+        success=True,
+        analysis=analysis_data,
+        market_data=market_result["data"],
+        troll_level=troll_level,
+        **extra
+    )
+
+
 @app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_content(request: AnalysisRequest):
+async def analyze_content(request: AnalysisRequest, http_request: Request):
     """
     Main endpoint: Analyze webpage content and return stock recommendation.
     
     Takes webpage text, generates AI analysis, and fetches real market data.
+    Repeat visits can send just url + content_hash: if the page is unchanged
+    the cached analysis comes back with cached=true, otherwise a 412 asks
+    for the full text.
     
     Args:
-        webpage_text: The text content to analyze
+        webpage_text: The text content to analyze (optional on revalidation)
+        url: Page URL, used as the cache key
+        content_hash: SHA-256 of the whitespace-collapsed text, see analysis_cache.content_fingerprint
         troll_level: 0-100 scale. 0=serious/professional, 100=maximum troll
+    
+    Headers:
+        X-Request-Class: Optional, can lower priority to batch or demo but never raise it
+    
+    Under overload the AI step is shed or times out early; the last analysis
+    for the URL is served with degraded=true, or a 503 if there isn't one.
     """
-    if not request.webpage_text or len(request.webpage_text.strip()) < 50:
+    # Get troll level (default 50)
+    troll_level = request.troll_level if request.troll_level is not None else 50
+    
+    # Step 0: Reuse the last analysis for this page if the content hasn't changed
+    fingerprint = content_fingerprint(request.webpage_text) if request.webpage_text else request.content_hash
+    if request.url and fingerprint:
+        cached = analysis_cache.get(request.url, troll_level, fingerprint)
+        if cached is not None:
+            return await asyncio.to_thread(
+                build_analysis_response,
+                dict(cached["analysis"]), troll_level, cached=True, content_hash=fingerprint
+            )
+    
+    if request.webpage_text is None:
+        if not (request.url and request.content_hash):
+            raise HTTPException(
+                status_code=400,
+                detail="Send webpage_text, or url + content_hash to reuse a cached take."
+            )
+        raise HTTPException(
+            status_code=412,
+            detail="Page changed or not cached yet. Send webpage_text, no cap."
+        )
+    
+    if len(request.webpage_text.strip()) < 50:
         raise HTTPException(
             status_code=400, 
             detail="Webpage text too short. Need at least 50 characters of content, no cap."
         )
     
-    # Get troll level (default 50)
-    troll_level = request.troll_level if request.troll_level is not None else 50
-    
-    # Step 1: Get AI analysis with troll level
-    ai_result = analyze_webpage_content(request.webpage_text, troll_level)
+    # Step 1: Get AI analysis with troll level, once the admission queue lets us in
+    try:
+        ai_result = await admission.run(
+            get_client_id(http_request),
+            get_request_class(http_request),
+            analyze_webpage_content, request.webpage_text, troll_level
+        )
+    except AdmissionRejected as e:
+        stale = analysis_cache.peek(request.url, troll_level) if request.url else None
+        if stale is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Servers are cooked rn ({e}). Try again in a sec.",
+                headers={"Retry-After": "5"}
+            )
+        return await asyncio.to_thread(
+            build_analysis_response,
+            dict(stale["analysis"]), troll_level,
+            cached=True, degraded=True, content_hash=stale["fingerprint"]
+        )
     
     if not ai_result["success"]:
         return AnalysisResponse(
@@ -107,43 +252,42 @@ async def analyze_content(request: AnalysisRequest):
             error=ai_result.get("error", "AI analysis failed")
         )
     
-    analysis_data = ai_result["data"]
-    ticker = analysis_data.get("ticker", "")
-    asset_type = analysis_data.get("asset_type", "stock")
-    forecast = analysis_data.get("forecast")
+    # Step 2: Market data
+    response = await asyncio.to_thread(
+        build_analysis_response, ai_result["data"], troll_level, content_hash=fingerprint
+    )
     
-    # Step 2: Fetch real market data for the ticker
-    market_result = get_ticker_data(ticker, asset_type, forecast=forecast)
+    if request.url:
+        analysis_cache.set(request.url, troll_level, fingerprint, dict(response.analysis))
     
-    if not market_result["success"]:
-        # Still return the analysis, just without market data
-        return AnalysisResponse(
-            success=True,
-            analysis=analysis_data,
-            market_data=None,
-            troll_level=troll_level,
-            error=f"Warning: Could not fetch market data - {market_result.get('error')}"
-        )
-    
-    return AnalysisResponse(
-        success=True,
-        analysis=analysis_data,
-        market_data=market_result["data"],
-        troll_level=troll_level
-    )
+    return response
 
 
 @app.get("/analyze/demo")
-async def demo_analysis(troll_level: int = 50):
+async def demo_analysis(http_request: Request, troll_level: int = 50):
     """
     Demo endpoint with hardcoded sample input.
     Perfect for testing without the Chrome extension.
+    Runs at the lowest admission priority and falls back to the last demo answer under load.
     
     Args:
         troll_level: 0-100 scale. 0=serious, 100=maximum troll
     """
     # Use hardcoded sample text
-    ai_result = analyze_webpage_content(SAMPLE_WEBPAGE_TEXT, troll_level)
+    try:
+        ai_result = await admission.run(
+            get_client_id(http_request), "demo",
+            analyze_webpage_content, SAMPLE_WEBPAGE_TEXT, troll_level
+        )
+    except AdmissionRejected as e:
+        stale = analysis_cache.peek(DEMO_URL, troll_level)
+        if stale is None:
+            return {
+                "success": False,
+                "error": f"Servers are cooked rn ({e}). Try again in a sec.",
+                "sample_input": SAMPLE_WEBPAGE_TEXT[:200] + "..."
+            }
+        ai_result = {"success": True, "data": dict(stale["analysis"]), "degraded": True}
     
     if not ai_result["success"]:
         return {
@@ -155,29 +299,46 @@ async def demo_analysis(troll_level: int = 50):
     analysis_data = ai_result["data"]
     ticker = analysis_data.get("ticker", "")
     asset_type = analysis_data.get("asset_type", "stock")
+    if not ai_result.get("degraded"):
+        analysis_cache.set(DEMO_URL, troll_level, content_fingerprint(SAMPLE_WEBPAGE_TEXT), dict(analysis_data))
     
     # Fetch market data
-    market_result = get_ticker_data(ticker, asset_type)
+    market_result = await asyncio.to_thread(get_ticker_data, ticker, asset_type)
     
     return {
         "success": True,
         "sample_input_preview": SAMPLE_WEBPAGE_TEXT[:200] + "...",
         "analysis": analysis_data,
         "market_data": market_result.get("data") if market_result["success"] else None,
-        "troll_level": troll_level
+        "troll_level": troll_level,
+        "degraded": bool(ai_result.get("degraded"))
     }
 
 
 @app.get("/ticker/{ticker}")
-async def get_ticker_info(ticker: str, asset_type: str = "stock"):
+async def get_ticker_info(
+    ticker: str,
+    asset_type: str = "stock",
+    period: str = Query("7d", alias="range"),
+    interval: str = "1d"
+):
     """
     Get market data for a specific ticker.
     
     Args:
         ticker: Stock or crypto symbol (e.g., AAPL, BTC)
         asset_type: Either 'stock' or 'crypto'
+        range: Chart range - 1d, 7d, 1mo or 1y
+        interval: Chart resolution - 1h, 4h, 1d or 1wk
     """
-    result = get_ticker_data(ticker.upper(), asset_type)
+    if period not in RANGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported range '{period}'. Pick one of: {', '.join(RANGES)}")
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Unsupported interval '{interval}'. Pick one of: {', '.join(INTERVALS)}")
+    if INTERVALS[interval]["seconds"] >= RANGES[period] * 86400:
+        raise HTTPException(status_code=400, detail=f"Interval '{interval}' is too coarse for range '{period}', that's barely a chart")
+    
+    result = get_ticker_data(ticker.upper(), asset_type, period=period, interval=interval)
     
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result.get("error"))
@@ -186,6 +347,89 @@ async def get_ticker_info(ticker: str, asset_type: str = "stock"):
 
 
 
+async def _handle_price_messages(websocket: WebSocket, subscriber: Subscriber):
+    """Apply subscribe/unsubscribe messages from one client until it disconnects."""
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (json.JSONDecodeError, KeyError):
+                await websocket.send_json({"type": "error", "error": "Send JSON or send nothing bestie"})
+                continue
+            
+            action = message.get("action") if isinstance(message, dict) else None
+            tickers = message.get("tickers") if isinstance(message, dict) else None
+            if action not in ("subscribe", "unsubscribe") or not isinstance(tickers, list):
+                await websocket.send_json({"type": "error", "error": "Expected {action: subscribe|unsubscribe, tickers: [...]}"})
+                continue
+            if len(tickers) > MAX_TICKERS_PER_CLIENT:
+                await websocket.send_json({"type": "error", "error": f"Max {MAX_TICKERS_PER_CLIENT} tickers per message, chill"})
+                continue
+            
+            # Trim before resolving: tickers outside the index cost a blocking upstream lookup each
+            tickers = list(dict.fromkeys(str(ticker).strip() for ticker in tickers))
+            rejected = []
+            if action == "subscribe":
+                tickers = [ticker for ticker in tickers if ticker not in subscriber.tickers]
+                room = max(0, MAX_TICKERS_PER_CLIENT - len(subscriber.tickers))
+                tickers, rejected = tickers[:room], tickers[room:]
+            
+            # Normalize through the symbol index so "BTC" and "BTC-USD" share one poller
+            symbols = []
+            for ticker in tickers:
+                resolved = await asyncio.to_thread(resolve_ticker, str(ticker))
+                if resolved is None:
+                    rejected.append(ticker)
+                else:
+                    symbols.append(resolved["symbol"])
+            
+            if action == "unsubscribe":
+                price_hub.unsubscribe(subscriber, symbols)
+                await websocket.send_json({"type": "unsubscribed", "tickers": symbols})
+                continue
+            
+            added = price_hub.subscribe(subscriber, symbols)
+            await websocket.send_json({
+                "type": "subscribed",
+                "tickers": sorted(subscriber.tickers),
+                "added": added,
+                "rejected": rejected
+            })
+    except WebSocketDisconnect:
+        pass
+
+
+@app.websocket("/ws/prices")
+async def price_stream(websocket: WebSocket):
+    """
+    Live price push for open side panels.
+    
+    Client sends: {"action": "subscribe" | "unsubscribe", "tickers": ["AAPL", "BTC"]}
+    Server sends: {"type": "subscribed", ...}, {"type": "prices", "updates": [...]}, {"type": "error", ...}
+    
+    Slow clients only ever get the latest price per ticker, never a backlog.
+    Clients that stop reading entirely get disconnected.
+    """
+    await websocket.accept()
+    subscriber = Subscriber()
+    pump = asyncio.create_task(price_hub.pump(subscriber, websocket.send_json))
+    receiver = asyncio.create_task(_handle_price_messages(websocket, subscriber))
+    
+    try:
+        await asyncio.wait({pump, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        pump.cancel()
+        receiver.cancel()
+        price_hub.unsubscribe(subscriber)
+    
+    # Pump gave up on this client (too slow or send failed), tell it to come back later
+    if pump.done() and not pump.cancelled():
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
+
 @app.post("/portfolio/init")
 async def portfolio_init(request: InitUserRequest):
     return init_user(request.user_id, request.username)
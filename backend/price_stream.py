@@ -0,0 +1,222 @@
+"""
+RobbingHood Price Stream
+One polling loop per ticker, fanned out to every side panel watching it
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+
+# Seconds between price polls for a ticker
+POLL_INTERVAL = 5.0
+
+# Max tickers a single client can watch at once
+MAX_TICKERS_PER_CLIENT = 20
+
+# A client that can't take a message within this many seconds gets dropped
+SEND_TIMEOUT = 10.0
+
+
+class Subscriber:
+    """
+    One connected client. Updates are coalesced per ticker, so a slow client
+    only ever has the latest price for each ticker queued, never a backlog.
+    """
+
+    def __init__(self):
+        self.tickers = set()
+        self.pending = {}
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.coalesced = 0
+
+    def push(self, update: dict) -> None:
+        """Queue an update without blocking, replacing any unsent one for the same ticker."""
+        ticker = update["ticker"]
+        if ticker in self.pending:
+            self.coalesced += 1
+        self.pending[ticker] = update
+        self.ready.set()
+
+    async def next_batch(self) -> list:
+        """Wait for updates, then take everything queued since the last batch."""
+        await self.ready.wait()
+        self.ready.clear()
+        batch = list(self.pending.values())
+        self.pending.clear()
+        return batch
+
+
+class PriceHub:
+    """
+    Shares one poller per ticker between all subscribers.
+    Pollers start with the first subscriber and stop when the last one leaves,
+    so upstream calls scale with distinct tickers, not with clients.
+    """
+
+    def __init__(self, fetch_price: Callable[[str], Optional[dict]], poll_interval: float = POLL_INTERVAL):
+        self.fetch_price = fetch_price
+        self.poll_interval = poll_interval
+        self.subscribers = {}
+        self.pollers = {}
+        self.latest = {}
+        self.polls = 0
+        self.poll_errors = 0
+        self.dropped_clients = 0
+
+    def subscribe(self, subscriber: Subscriber, tickers: list) -> list:
+        """
+        Add tickers to a subscriber, starting pollers as needed.
+
+        Returns:
+            list: Tickers actually added (capped at MAX_TICKERS_PER_CLIENT per client)
+        """
+        added = []
+        for ticker in tickers:
+            if ticker in subscriber.tickers:
+                continue
+            if len(subscriber.tickers) >= MAX_TICKERS_PER_CLIENT:
+                break
+
+            subscriber.tickers.add(ticker)
+            self.subscribers.setdefault(ticker, set()).add(subscriber)
+            added.append(ticker)
+
+            # New watchers get the last known price right away instead of waiting a poll
+            if ticker in self.latest:
+                subscriber.push(self.latest[ticker])
+            if ticker not in self.pollers:
+                self.pollers[ticker] = asyncio.create_task(self._poll(ticker))
+        return added
+
+    def unsubscribe(self, subscriber: Subscriber, tickers: Optional[list] = None) -> None:
+        """Remove tickers (or all of them) from a subscriber, stopping idle pollers."""
+        for ticker in list(subscriber.tickers if tickers is None else tickers):
+            subscriber.tickers.discard(ticker)
+            subscriber.pending.pop(ticker, None)
+
+            watchers = self.subscribers.get(ticker)
+            if watchers is None:
+                continue
+            watchers.discard(subscriber)
+            if not watchers:
+                del self.subscribers[ticker]
+                poller = self.pollers.pop(ticker, None)
+                if poller is not None:
+                    poller.cancel()
+                self.latest.pop(ticker, None)
+
+    def publish(self, update: dict) -> None:
+        """Fan an update out to everyone watching its ticker. Never blocks on slow clients."""
+        ticker = update["ticker"]
+        self.latest[ticker] = update
+        for subscriber in self.subscribers.get(ticker, ()):
+            subscriber.push(update)
+
+    async def _poll(self, ticker: str) -> None:
+        while True:
+            try:
+                self.polls += 1
+                update = await asyncio.to_thread(self.fetch_price, ticker)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.poll_errors += 1
+                print(f"[WARN] Price poll failed for {ticker}: {e}")
+                update = None
+
+            # Only push when something actually moved
+            previous = self.latest.get(ticker)
+            if update is not None and (previous is None or previous.get("price") != update.get("price")):
+                self.publish({**update, "ticker": ticker, "timestamp": time.time()})
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def pump(self, subscriber: Subscriber, send: Callable[[dict], Awaitable[None]]) -> None:
+        """
+        Deliver a subscriber's updates through `send` until a send fails or times out.
+        While a send is in flight, newer prices coalesce in the subscriber's queue.
+        """
+        while True:
+            batch = await subscriber.next_batch()
+            if not batch:
+                continue
+
+            # asyncio.wait instead of wait_for: wait_for can swallow our own cancellation on 3.9-3.11
+            send_task = asyncio.ensure_future(send({"type": "prices", "updates": batch}))
+            try:
+                done, _ = await asyncio.wait({send_task}, timeout=SEND_TIMEOUT)
+            except asyncio.CancelledError:
+                send_task.cancel()
+                raise
+            if not done:
+                send_task.cancel()
+                self.dropped_clients += 1
+                return
+            if send_task.exception() is not None:
+                # Socket died mid-send, nothing left to deliver to
+                return
+            subscriber.sent += len(batch)
+
+    def stats(self) -> dict:
+        """Numbers for the health endpoint."""
+        clients = set()
+        for watchers in self.subscribers.values():
+            clients.update(watchers)
+        return {
+            "tickers": len(self.pollers),
+            "clients": len(clients),
+            "polls": self.polls,
+            "poll_errors": self.poll_errors,
+            "coalesced_updates": sum(client.coalesced for client in clients),
+            "dropped_clients": self.dropped_clients,
+        }
+
+
+if __name__ == "__main__":
+    # Simulate a crowd of side panels against a fake price source
+    import random
+
+    NUM_CLIENTS = 5000
+    TICKERS = ["AAPL", "NVDA", "TSLA", "BTC-USD", "ETH-USD"]
+
+    fetch_calls = {}
+
+    def fake_price(ticker: str) -> dict:
+        fetch_calls[ticker] = fetch_calls.get(ticker, 0) + 1
+        return {"price": round(random.uniform(90, 110), 2)}
+
+    async def simulate():
+        hub = PriceHub(fake_price, poll_interval=0.2)
+        clients = [Subscriber() for _ in range(NUM_CLIENTS)]
+        received = [0] * NUM_CLIENTS
+
+        def make_send(i: int, delay: float):
+            async def send(message: dict):
+                await asyncio.sleep(delay)
+                received[i] += len(message["updates"])
+            return send
+
+        # Every 10th client is a slowpoke that takes longer to read than the poll interval
+        pumps = []
+        for i, client in enumerate(clients):
+            hub.subscribe(client, random.sample(TICKERS, 2))
+            delay = 0.5 if i % 10 == 0 else 0
+            pumps.append(asyncio.create_task(hub.pump(client, make_send(i, delay))))
+
+        await asyncio.sleep(2)
+        stats = hub.stats()
+        for client in clients:
+            hub.unsubscribe(client)
+        for task in pumps:
+            task.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+
+        print(f"Clients: {NUM_CLIENTS}, tickers: {len(TICKERS)}")
+        print(f"Upstream fetches per ticker: {fetch_calls}")
+        print(f"Updates delivered: {sum(received)} (slow clients: {sum(received[::10])})")
+        print(f"Hub stats: {stats}")
+        print(f"Pollers left running: {len(hub.pollers)}")
+
+    asyncio.run(simulate())
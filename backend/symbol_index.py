@@ -0,0 +1,280 @@
+"""
+RobbingHood Symbol Index
+Local ticker lookup so we stop hitting yfinance for every sus symbol the AI spits out
+"""
+
+import bisect
+import csv
+import difflib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+LISTING_PATH = os.getenv(
+    "SYMBOL_LISTING_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.csv")
+)
+
+# Shorter queries are more likely an unlisted ticker than a company name ("X" is not XRP)
+MIN_NAME_QUERY_LENGTH = 4
+
+# Words that show up in company names but say nothing about which company it is
+NAME_STOPWORDS = {
+    "the", "inc", "corp", "corporation", "company", "co", "ltd", "plc", "group",
+    "holdings", "holding", "class", "sa", "nv", "and", "&",
+}
+
+# "NVDA", "$nvda", "BRK.B", "BTC-USD" - short and shaped like a ticker, not a company name
+SYMBOL_PATTERN = re.compile(r"^[A-Z][A-Z0-9]{0,4}([.\-][A-Z])?(-USD)?$")
+
+
+def normalize_symbol(raw: str) -> str:
+    """
+    Clean up a ticker the way the AI tends to mangle them.
+    "$nvda" -> "NVDA", "brk.b" -> "BRK-B", " btc-usd " -> "BTC-USD"
+    """
+    symbol = (raw or "").strip().upper()
+    symbol = symbol.lstrip("$")
+    symbol = re.sub(r"\s+", "", symbol)
+    return symbol.replace(".", "-").replace("/", "-")
+
+
+def looks_like_symbol(raw: str) -> bool:
+    """
+    Is this ticker-shaped rather than a company name?
+    Needs to be uppercase unless it comes with a "$" ("$nvda" yes, "Nvidia" no).
+    """
+    text = (raw or "").strip()
+    if text.startswith("$"):
+        text = text[1:].upper()
+    return bool(SYMBOL_PATTERN.match(text))
+
+
+def normalize_name(raw: str) -> str:
+    """
+    Lowercase a company name and drop punctuation/legal suffixes for matching.
+    A trailing "USD" is the crypto pair quote ("Bitcoin USD"), not part of the name,
+    but a leading one is ("USD Coin").
+    """
+    words = [word for word in re.findall(r"[a-z0-9]+", (raw or "").lower()) if word not in NAME_STOPWORDS]
+    if len(words) > 1 and words[-1] == "usd":
+        words.pop()
+    return " ".join(words)
+
+
+class SymbolIndex:
+    """
+    In-memory index over the bundled listing file.
+    Exact symbol lookups are a dict hit, name search is bisect over a sorted list.
+    """
+
+    def __init__(self, rows: list):
+        self.by_symbol = {}
+        self.aliases = {}
+        self.by_name = {}
+
+        for row in rows:
+            symbol = normalize_symbol(row.get("symbol", ""))
+            if not symbol:
+                continue
+            entry = {
+                "symbol": symbol,
+                "name": (row.get("name") or symbol).strip(),
+                "exchange": (row.get("exchange") or "").strip().upper(),
+                "asset_type": (row.get("asset_type") or "stock").strip().lower(),
+            }
+            self.by_symbol[symbol] = entry
+
+            # Crypto pairs are listed as "BTC-USD" but the AI usually just says "BTC"
+            if entry["asset_type"] == "crypto" and symbol.endswith("-USD"):
+                self.aliases.setdefault(symbol[:-len("-USD")], symbol)
+
+            name_key = normalize_name(entry["name"])
+            if name_key:
+                self.by_name.setdefault(name_key, symbol)
+
+        self.sorted_names = sorted(self.by_name)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "SymbolIndex":
+        """Load an index from a CSV with symbol,name,exchange,asset_type columns."""
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def __len__(self) -> int:
+        return len(self.by_symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.lookup(symbol) is not None
+
+    def lookup(self, symbol: str, asset_type: Optional[str] = None) -> Optional[dict]:
+        """
+        Exact symbol lookup (after normalization), including crypto base aliases.
+
+        Args:
+            symbol: Raw ticker, e.g. "$NVDA" or "BTC"
+            asset_type: Optional hint, "crypto" prefers the "-USD" pair over a same-named stock
+
+        Returns:
+            dict: Listing entry, or None if the symbol is not in the index
+        """
+        key = normalize_symbol(symbol)
+        if not key:
+            return None
+
+        if asset_type == "crypto":
+            pair = self.aliases.get(key) or (key if key.endswith("-USD") else f"{key}-USD")
+            if pair in self.by_symbol:
+                return self.by_symbol[pair]
+
+        entry = self.by_symbol.get(key)
+        if entry is not None:
+            return entry
+
+        alias = self.aliases.get(key)
+        return self.by_symbol.get(alias) if alias else None
+
+    def search_prefix(self, query: str, limit: int = 5) -> list:
+        """
+        Find listings whose name starts with the query ("nvid" -> NVIDIA).
+
+        Returns:
+            list: Up to `limit` listing entries in name order
+        """
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+
+        results = []
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        for name_key in self.sorted_names[start:]:
+            if not name_key.startswith(prefix) or len(results) >= limit:
+                break
+            results.append(self.by_symbol[self.by_name[name_key]])
+        return results
+
+    def search_fuzzy(self, query: str, limit: int = 5, cutoff: float = 0.75) -> list:
+        """
+        Typo-tolerant name search for when the AI gets creative with spelling.
+
+        Returns:
+            list: Up to `limit` listing entries, best match first
+        """
+        name_key = normalize_name(query)
+        if not name_key:
+            return []
+        matches = difflib.get_close_matches(name_key, self.sorted_names, n=limit, cutoff=cutoff)
+        return [self.by_symbol[self.by_name[match]] for match in matches]
+
+    def search_name(self, raw: str) -> Optional[dict]:
+        """
+        Find a listing by company name: exact name, then name prefix, then fuzzy.
+
+        Returns:
+            dict: Best listing entry, or None if no name is close enough
+        """
+        name_key = normalize_name(raw)
+        if name_key in self.by_name:
+            return self.by_symbol[self.by_name[name_key]]
+        if len(name_key) < MIN_NAME_QUERY_LENGTH:
+            return None
+
+        for search in (self.search_prefix, self.search_fuzzy):
+            matches = search(raw, limit=1)
+            if matches:
+                return matches[0]
+        return None
+
+    def resolve(self, raw: str, asset_type: Optional[str] = None) -> Optional[dict]:
+        """
+        Map whatever the AI returned (symbol, "$SYMBOL", company name) to a listing.
+        Ticker-shaped input only gets an exact lookup - an unlisted real ticker like
+        "GOLD" must not get name-matched to some other company. Everything else
+        goes through the name search too.
+
+        Returns:
+            dict: Listing entry, or None if nothing in the index matches
+        """
+        entry = self.lookup(raw, asset_type)
+        if entry is not None or looks_like_symbol(raw):
+            return entry
+        return self.search_name(raw)
+
+
+class ValidationCache:
+    """
+    Remembers yfinance validation results so we only ask once per symbol.
+    Valid symbols are kept longer than invalid ones since listings rarely disappear.
+    """
+
+    def __init__(self, positive_ttl: float = 24 * 3600, negative_ttl: float = 3600, max_size: int = 4096):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[bool]:
+        """Return the cached validity for a symbol, or None if unknown/expired."""
+        key = normalize_symbol(symbol)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            is_valid, expires_at = cached
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return is_valid
+
+    def set(self, symbol: str, is_valid: bool) -> None:
+        """Record a validation result, evicting the least recently used entry when full."""
+        key = normalize_symbol(symbol)
+        ttl = self.positive_ttl if is_valid else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (is_valid, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    """Load the bundled listing once and reuse it. Missing file = empty index, not a crash."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = SymbolIndex.from_csv(LISTING_PATH)
+                except OSError as e:
+                    print(f"[WARN] Could not load symbol listing from {LISTING_PATH}: {e}")
+                    _index = SymbolIndex([])
+    return _index
+
+
+validation_cache = ValidationCache()
+
+
+if __name__ == "__main__":
+    # Poke the index with the usual AI weirdness
+    index = get_symbol_index()
+    print(f"Loaded {len(index)} symbols from {LISTING_PATH}")
+    print("-" * 50)
+
+    for query, hint in [("$NVDA", None), ("BTC", "crypto"), ("brk.b", None), ("Nvidia", None),
+                        ("Netflx", None), ("Dogecoin", None), ("USD Coin", None), ("GOLD", None), ("ZZZZ", None)]:
+        entry = index.resolve(query, hint)
+        print(f"{query!r:>12} -> {entry['symbol'] if entry else None}")
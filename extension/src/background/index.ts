@@ -85,7 +85,7 @@ async function runAnalysis(pageData: { title: string; url: string; text: string
   });
 
   try {
-    const result = await analyzeWithBackend(pageData.text, currentTrollLevel);
+    const result = await analyzeWithBackend(pageData.text, pageData.url, currentTrollLevel);
 
     // Send result ONCE
     chrome.runtime.sendMessage({
@@ -107,21 +107,43 @@ async function runAnalysis(pageData: { title: string; url: string; text: string
   }
 }
 
-async function analyzeWithBackend(webpageText: string, trollLevel: number) {
-  if (!webpageText || webpageText.trim().length < 50) {
-    throw new Error("Not enough content to analyze");
-  }
+// Must match content_fingerprint in backend/analysis_cache.py: collapse whitespace, then SHA-256
+async function contentHash(text: string) {
+  const normalized = text.trim().split(/\s+/).join(" ");
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(normalized));
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+}
 
-  const response = await fetch(`${API_BASE}/analyze`, {
+async function postAnalyze(body: Record<string, unknown>) {
+  return fetch(`${API_BASE}/analyze`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
     },
-    body: JSON.stringify({
+    body: JSON.stringify(body)
+  });
+}
+
+async function analyzeWithBackend(webpageText: string, url: string, trollLevel: number) {
+  if (!webpageText || webpageText.trim().length < 50) {
+    throw new Error("Not enough content to analyze");
+  }
+
+  const hash = await contentHash(webpageText);
+
+  // Ask first with just the hash, the backend reuses its analysis if the page hasn't changed
+  let response = url
+    ? await postAnalyze({ url, content_hash: hash, troll_level: trollLevel })
+    : null;
+
+  // 412 = backend hasn't seen this version of the page, send the full text
+  if (!response || response.status === 412) {
+    response = await postAnalyze({
       webpage_text: webpageText,
+      url: url || undefined,
       troll_level: trollLevel
-    })
-  });
+    });
+  }
 
   if (!response.ok) {
     const errorData = await response.json().catch(() => ({}));
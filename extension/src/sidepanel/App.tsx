@@ -260,6 +260,58 @@ export default function App() {
     }
   };
 
+  // Live prices for the current ticker, pushed from the backend's shared poller.
+  // Kept out of panelState.market so ticks don't re-fire the trade panel auto-fill below.
+  const [liveQuote, setLiveQuote] = useState<{ price: number; change_24h_percent?: number } | null>(null);
+  const [liveStale, setLiveStale] = useState(false);
+  const liveTicker = market?.ticker;
+  useEffect(() => {
+    setLiveQuote(null);
+    setLiveStale(false);
+    if (!liveTicker) return;
+
+    // The server drops slow clients (1013) and networks blip, so keep reconnecting with backoff
+    let ws: WebSocket | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let attempts = 0;
+    let stopped = false;
+
+    const connect = () => {
+      ws = new WebSocket(`${API_BASE.replace(/^http/, "ws")}/ws/prices`);
+      ws.onopen = () => {
+        attempts = 0;
+        ws?.send(JSON.stringify({ action: "subscribe", tickers: [liveTicker] }));
+      };
+      ws.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message?.type !== "prices") return;
+
+        const update = message.updates?.[message.updates.length - 1];
+        if (!update) return;
+        setLiveQuote({ price: update.price, change_24h_percent: update.change_24h_percent });
+        setLiveStale(false);
+      };
+      ws.onerror = () => ws?.close();
+      ws.onclose = () => {
+        if (stopped) return;
+        setLiveStale(true);
+        const delay = Math.min(30000, 1000 * 2 ** attempts) * (0.5 + Math.random() / 2);
+        attempts += 1;
+        retryTimer = setTimeout(connect, delay);
+      };
+    };
+    connect();
+
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      ws?.close();
+    };
+  }, [liveTicker]);
+
+  const livePrice = liveQuote?.price ?? market?.current_price;
+  const liveChange = liveQuote?.change_24h_percent ?? market?.change_24h_percent ?? 0;
+
   // Update trade panel from LLM result
   useEffect(() => {
     window.updateFromResult = (ticker: string, price: number) => {
@@ -461,9 +513,9 @@ export default function App() {
                   </p>
                   <p className="text-2xl font-bold text-ink">{analysis.confidence}%</p>
                   {market && (
-                    <p className={`text-sm font-semibold ${market.change_24h_percent >= 0 ? "text-green-600" : "text-red-600"
+                    <p className={`text-sm font-semibold ${liveChange >= 0 ? "text-green-600" : "text-red-600"
                       }`}>
-                      {market.change_24h_percent >= 0 ? "+" : ""}{market.change_24h_percent?.toFixed(2)}%
+                      {liveChange >= 0 ? "+" : ""}{liveChange.toFixed(2)}%
                     </p>
                   )}
                 </div>
@@ -495,8 +547,8 @@ export default function App() {
               <section className="rounded-3xl border border-black/10 bg-white/80 p-4 shadow-lg shadow-black/10">
                 <div className="flex items-center justify-between mb-3">
                   <p className="text-xs uppercase tracking-[0.3em] text-slate-500">📈 7-Day Price Action</p>
-                  <span className={`text-sm font-bold ${market.change_24h_percent >= 0 ? "text-green-600" : "text-red-600"}`}>
-                    {market.change_24h_percent >= 0 ? "▲" : "▼"} {Math.abs(market.change_24h_percent).toFixed(2)}%
+                  <span className={`text-sm font-bold ${liveChange >= 0 ? "text-green-600" : "text-red-600"}`}>
+                    {liveChange >= 0 ? "▲" : "▼"} {Math.abs(liveChange).toFixed(2)}%
                   </span>
                 </div>
                 <div className="h-32 w-full">
@@ -538,13 +590,14 @@ export default function App() {
                 <div className="mt-3 grid grid-cols-2 gap-3">
                   <div className="bg-slate-50 rounded-xl p-3 text-center">
                     <p className="text-xs text-slate-500">Price</p>
-                    <p className="text-lg font-bold text-ink">${market.current_price?.toLocaleString()}</p>
+                    <p className="text-lg font-bold text-ink">${livePrice?.toLocaleString()}</p>
+                    {liveStale && <p className="text-xs text-slate-400">reconnecting...</p>}
                   </div>
                   <div className="bg-slate-50 rounded-xl p-3 text-center">
                     <p className="text-xs text-slate-500">24h Change</p>
-                    <p className={`text-lg font-bold ${market.change_24h_percent >= 0 ? "text-green-600" : "text-red-600"
+                    <p className={`text-lg font-bold ${liveChange >= 0 ? "text-green-600" : "text-red-600"
                       }`}>
-                      {market.change_24h_percent >= 0 ? "+" : ""}{market.change_24h_percent?.toFixed(2)}%
+                      {liveChange >= 0 ? "+" : ""}{liveChange.toFixed(2)}%
                     </p>
                   </div>
                 </div>